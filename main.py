@@ -1,13 +1,16 @@
+import aiohttp
+import argparse
+import asyncio
 import csv
 import logging
 import neo4j
 import os
-import uuid
+import pickle
+import re
+import subprocess
+from array import array
 from concurrent.futures import ThreadPoolExecutor
-from pyopenie import OpenIE5
-from queue import Empty, Queue
-from spacy.lang.en import English
-from time import sleep
+from spacy.lang.en.stop_words import STOP_WORDS
 from typing import List
 
 ENCODING = "utf-8"
@@ -15,49 +18,76 @@ DATA_DIRECTORY = "./data"
 CACHE_DIRECTORY = "cache/"
 CACHED_CONNECTIONS_FILE = "entity_connections.cache"
 CACHED_FILTERED_CONNECTIONS_FILE = "entity_connections_filtered.cache"
-QUEUE_WAIT_TIMEOUT = 5
-CONNECTION_BUILDER_THREADS = 5
+IMPORT_DIRECTORY = "import/"
+IMPORT_NODES_FILE = "nodes.csv"
+IMPORT_RELATIONSHIPS_FILE = "relationships.csv"
+FILE_READER_THREADS = 32
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+ENTITY_STOP_WORDS = frozenset(STOP_WORDS)
 RELATIONSHIP_EXTRACTION_SERVICE_RETRIES = 5
-RELATIONSHIP_EXTRACTION_SERVICE_TIMEOUT = 3
+RELATIONSHIP_EXTRACTION_SERVICE_BACKOFF = 0.5
+RELATIONSHIP_EXTRACTION_SERVICE_BACKOFF_MAX = 30
 RELATIONSHIP_EXTRACTION_SERVICE_URL = 'http://localhost:8000'
+RELATIONSHIP_EXTRACTION_SERVICE_ENDPOINT = '/getExtraction'
+RELATIONSHIP_EXTRACTION_CONCURRENCY = int(os.environ.get("KG_EXTRACT_CONCURRENCY", 128))
 NEO4J_URL = "bolt://localhost:7687"
+NEO4J_DATABASE = "neo4j"
 NEO4J_CREDENTIALS_FILE = ".credentials"
-GRAPH_LOADER_THREADS = 1
+QUERY_BATCH_SIZE = 20000
+GRAPH_LOADER_THREADS = 4
 
 class Document:
+    __slots__ = ("file_name", "base_name", "sentences")
     file_name:str
+    base_name:str
     sentences:list
     def __init__(self, file_name, sentences) -> None:
         self.file_name = file_name
+        self.base_name = os.path.basename(file_name.replace("\\", os.sep))
         self.sentences = sentences
 
 class DocumentSentence:
+    __slots__ = ("document", "sentence")
     document:Document
     sentence:str
     def __init__(self, document, sentence) -> None:
         self.document = document
         self.sentence = sentence
 
-class EntityConnection:
-    from_entity:str
-    to_entity:str
-    relationship:str
-    confidence:float
-    file_name:str
+class ConnectionTable:
+    __slots__ = ("from_entity", "to_entity", "relationship", "confidence", "file_name")
+    from_entity:list
+    to_entity:list
+    relationship:list
+    confidence:array
+    file_name:list
 
-    def __str__(self) -> str:
-        return f"from_entity={self.from_entity}, to_entity={self.to_entity}, relationship={self.relationship}, confidence={self.confidence}, file_name={self.file_name}"
-
-    def __eq__(self, __o: object) -> bool:
-        if isinstance(__o, self.__class__):
-            other:EntityConnection = __o
-            return (self.from_entity == other.from_entity
-                and self.to_entity == other.to_entity
-                and self.relationship == other.relationship
-                and self.confidence == other.confidence
-                and self.file_name == other.file_name)
-        else:
-            return False
+    def __init__(self) -> None:
+        self.from_entity = list()
+        self.to_entity = list()
+        self.relationship = list()
+        self.confidence = array("f")
+        self.file_name = list()
+
+    def __len__(self) -> int:
+        return len(self.from_entity)
+
+    def append(self, from_entity:str, to_entity:str, relationship:str, confidence:float, file_name:str) -> None:
+        self.from_entity.append(from_entity)
+        self.to_entity.append(to_entity)
+        self.relationship.append(relationship)
+        self.confidence.append(confidence)
+        self.file_name.append(file_name)
+
+    def rows(self):
+        return zip(self.from_entity, self.to_entity, self.relationship, self.confidence, self.file_name)
+
+    def replace(self, other:"ConnectionTable") -> None:
+        self.from_entity = other.from_entity
+        self.to_entity = other.to_entity
+        self.relationship = other.relationship
+        self.confidence = other.confidence
+        self.file_name = other.file_name
 
 class Neo4jAuth:
     url:str
@@ -66,42 +96,69 @@ class Neo4jAuth:
     def __init__(self) -> None:
         self.url = NEO4J_URL
         with open(NEO4J_CREDENTIALS_FILE, encoding=ENCODING) as fd:
-            self.username = fd.readline().strip()
-            self.password = fd.readline().strip()
+            lines = fd.read().splitlines()
+        if len(lines) < 2:
+            raise ValueError(f"Credentials file {NEO4J_CREDENTIALS_FILE} must contain a username and a password on separate lines")
+        self.username = lines[0].strip()
+        self.password = lines[1].strip()
+        if not self.username or not self.password:
+            raise ValueError(f"Credentials file {NEO4J_CREDENTIALS_FILE} has an empty username or password")
 
 class Loader:
     auth:Neo4jAuth
 
+    SCHEMA_QUERY = "CREATE CONSTRAINT entity_name IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE"
+
+    NODES_QUERY = (
+        "UNWIND $names AS name "
+        "MERGE (:Entity { name: name })"
+    )
+
+    RELATIONSHIPS_QUERY = (
+        "UNWIND $rows AS r "
+        "MATCH (f:Entity { name: r.from_entity }), (t:Entity { name: r.to_entity }) "
+        "CREATE (f)-[:RELATION { name: r.relationship, confidence: r.confidence }]->(t)"
+    )
+
     def __init__(self, auth:Neo4jAuth) -> None:
         self.auth = auth
-        self.driver = neo4j.GraphDatabase.driver(self.auth.url, auth=(self.auth.username, self.auth.password))
-
-    def load_queries(self, queries:Queue) -> None:
-        with ThreadPoolExecutor(max_workers=GRAPH_LOADER_THREADS) as executor:
-            args = ((uuid.uuid4(), queries) for _ in range(GRAPH_LOADER_THREADS))
-            futures = executor.map(lambda p: self.load_query(*p), args)
-            for future in futures:
-                logging.debug(f"Load query thread result {future}")
-
-    def load_query(self, threadId:str, queries:Queue) -> None:
-        logging.info(f"[{threadId}] Loader thread started")
-        queries_loaded = 0
-        while True:
-            try:
-                query:str = queries.get(timeout=QUEUE_WAIT_TIMEOUT)
-            except Empty:
-                logging.info(f"[{threadId}] Loader thread exiting, queue empty, processed {queries_loaded} queries")
-                return queries_loaded, threadId
-
-            with self.driver.session() as session:
-                session.write_transaction((lambda tx, query: tx.run(query)), query)
-                queries_loaded += 1
-
-nlp:English = None
-extractor:OpenIE5 = None
-sentence_queue:Queue = None
-connection_list:List[EntityConnection] = None
-query_queue:Queue = None
+        self.driver = neo4j.GraphDatabase.driver(
+            self.auth.url,
+            auth=(self.auth.username, self.auth.password),
+            max_connection_pool_size=GRAPH_LOADER_THREADS,
+            connection_acquisition_timeout=60)
+
+    def ensure_schema(self) -> None:
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            session.write_transaction((lambda tx: tx.run(self.SCHEMA_QUERY)))
+        logging.info("Ensured unique constraint on :Entity(name)")
+
+    def load_connections(self, connections:ConnectionTable) -> None:
+        names = list(set(connections.from_entity) | set(connections.to_entity))
+        name_chunks = [names[i:i + QUERY_BATCH_SIZE] for i in range(0, len(names), QUERY_BATCH_SIZE)]
+        nodes_loaded = self.load_chunked(self.NODES_QUERY, "names", name_chunks)
+        logging.info(f"Loader merged {nodes_loaded} entities in {len(name_chunks)} transactions")
+
+        rows = build_relationship_rows(connections)
+        row_chunks = [rows[i:i + QUERY_BATCH_SIZE] for i in range(0, len(rows), QUERY_BATCH_SIZE)]
+        rows_loaded = self.load_chunked(self.RELATIONSHIPS_QUERY, "rows", row_chunks)
+        logging.info(f"Loader created {rows_loaded} relationships in {len(row_chunks)} transactions")
+
+    def load_chunked(self, query:str, param:str, chunks:List[list]) -> int:
+        workers = min(GRAPH_LOADER_THREADS, max(1, len(chunks)))
+        shares = [chunks[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map((lambda share: self.load_share(query, param, share)), shares))
+
+    def load_share(self, query:str, param:str, chunks:List[list]) -> int:
+        items_loaded = 0
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            for chunk in chunks:
+                session.write_transaction((lambda tx, items: tx.run(query, **{param: items})), chunk)
+                items_loaded += len(chunk)
+        return items_loaded
+
+connection_table:ConnectionTable = None
 loader:Loader = None
 connection_cache_source:int = 0
 
@@ -117,41 +174,28 @@ def init_cache():
     if not os.path.isdir(cache_dir):
         os.mkdir(cache_dir)
 
-def init_sentencizer() -> None:
-    global nlp
-    nlp = English()
-    nlp.add_pipe("sentencizer")
-
-def init_sentence_queue() -> None:
-    global sentence_queue
-    sentence_queue = Queue()
-
-def init_connection_list() -> None:
-    global connection_list
-    cache_connections = get_cache_connections()
-    connection_list = cache_connections if cache_connections != None else list()
-
-def init_query_queue() -> None:
-    global query_queue
-    query_queue = Queue()
-
-def init_relationship_extractor() -> None:
-    global extractor
-    extractor = OpenIE5(RELATIONSHIP_EXTRACTION_SERVICE_URL)
+def init_connection_table() -> None:
+    global connection_table
+    cache_table = get_cache_connection_table()
+    connection_table = cache_table if cache_table != None else ConnectionTable()
 
 def init_loader() -> None:
     global loader
     auth = Neo4jAuth()
     loader = Loader(auth)
+    loader.ensure_schema()
 
 def cache_data(file:str) -> None:
     path = os.path.join(DATA_DIRECTORY, CACHE_DIRECTORY, file)
-    with open(path, mode="w", encoding=ENCODING) as fd:
-        writer = csv.writer(fd)
-        for c in connection_list:
-            row = [c.from_entity, c.to_entity, c.relationship, c.confidence, c.file_name]
-            # TODO: fix extra CRLF at end of line
-            writer.writerow(row)
+    columns = (
+        connection_table.from_entity,
+        connection_table.to_entity,
+        connection_table.relationship,
+        connection_table.confidence,
+        connection_table.file_name,
+    )
+    with open(path, mode="wb", buffering=1<<20) as fd:
+        pickle.dump(columns, fd, protocol=pickle.HIGHEST_PROTOCOL)
 
 def cache_connections() -> None:
     cache_data(CACHED_CONNECTIONS_FILE)
@@ -159,33 +203,14 @@ def cache_connections() -> None:
 def cache_filtered_connections() -> None:
     cache_data(CACHED_FILTERED_CONNECTIONS_FILE)
 
-def get_cache_connections() -> List[EntityConnection]:
-    FROM_ENTITY_IDX = 0
-    TO_ENTITY_IDX = 1
-    RELATIONSHIP_IDX = 2
-    CONFIDENCE_IDX = 3
-    FILE_NAME_IDX = 4
-    
+def get_cache_connection_table() -> ConnectionTable:
     path = os.path.join(DATA_DIRECTORY, CACHE_DIRECTORY, CACHED_CONNECTIONS_FILE)
     if os.path.isfile(path):
-        connections = list()
-        with open(path, mode="r", encoding=ENCODING) as fd:
-            reader = csv.reader(fd)
-            for row in reader:
-                if len(row) == 0:
-                    continue
-                connection = EntityConnection()
-                connection.from_entity = row[FROM_ENTITY_IDX]
-                connection.to_entity = row[TO_ENTITY_IDX]
-                connection.relationship = row[RELATIONSHIP_IDX]
-                connection.confidence = float(row[CONFIDENCE_IDX])
-                connection.file_name = row[FILE_NAME_IDX]
-                connections.append(connection)
-        return connections
-
-def extract_sentences_from_data(data) -> list:
-    document = nlp(data)
-    return [s.text for s in document.sents]
+        with open(path, mode="rb") as fd:
+            columns = pickle.load(fd)
+        table = ConnectionTable()
+        (table.from_entity, table.to_entity, table.relationship, table.confidence, table.file_name) = columns
+        return table
 
 def extract_data_from_file(file_path) -> str:
     with open(file_path, encoding=ENCODING) as fd:
@@ -194,118 +219,90 @@ def extract_data_from_file(file_path) -> str:
 
 def build_documents_from_files(data_files) -> List[Document]:
     documents = list()
-    for data_file in data_files:
-        data = extract_data_from_file(data_file)
-        sentences = extract_sentences_from_data(data)
+    with ThreadPoolExecutor(max_workers=min(FILE_READER_THREADS, max(1, len(data_files)))) as executor:
+        texts = list(executor.map(extract_data_from_file, data_files))
+    for data_file, text in zip(data_files, texts):
+        sentences = [s.strip() for s in SENTENCE_SPLIT_PATTERN.split(text) if s.strip()]
         documents.append(Document(data_file, sentences))
     return documents
 
 def build_connection_from_extraction(extraction:dict, document:Document) -> None:
     if len(extraction["extraction"]["arg2s"]) > 0:
-        connection = EntityConnection()
-        connection.from_entity = extraction["extraction"]["arg1"]["text"]
-        # TODO: add logic for handling multiple arg2s
-        connection.to_entity = extraction["extraction"]["arg2s"][0]["text"]
-        connection.relationship = extraction["extraction"]["rel"]["text"]
-        connection.confidence = float(extraction["confidence"])
-        connection.file_name = os.path.basename(document.file_name.replace("\\", os.sep))
-        connection_list.append(connection)
-
-def build_connections_from_document(threadId:str) -> None:
-    logging.info(f"[{threadId}] Connection builder thread started")
-    sentences_processed = 0
-    while True:
-        try:
-            docSentence:DocumentSentence = sentence_queue.get(timeout=QUEUE_WAIT_TIMEOUT)
-        except Empty:
-            logging.info(f"[{threadId}] Connection builder thread exiting, queue empty, processed {sentences_processed} sentences")
-            return sentences_processed, threadId
-
-        got_extractions = False
-        current_try = RELATIONSHIP_EXTRACTION_SERVICE_RETRIES
-        while current_try > 0:
+        connection_table.append(
+            extraction["extraction"]["arg1"]["text"],
+            # TODO: add logic for handling multiple arg2s
+            extraction["extraction"]["arg2s"][0]["text"],
+            extraction["extraction"]["rel"]["text"],
+            float(extraction["confidence"]),
+            document.base_name)
+
+async def extract_relationships_from_sentence(session:aiohttp.ClientSession, semaphore:asyncio.Semaphore, docSentence:DocumentSentence):
+    url = RELATIONSHIP_EXTRACTION_SERVICE_URL + RELATIONSHIP_EXTRACTION_SERVICE_ENDPOINT
+    async with semaphore:
+        for attempt in range(RELATIONSHIP_EXTRACTION_SERVICE_RETRIES):
             try:
-                extractions = extractor.extract(docSentence.sentence)
-                got_extractions = True
-                sentences_processed += 1
-                break
+                async with session.post(url, data=docSentence.sentence, headers={"Content-Type": "text/plain"}) as response:
+                    response.raise_for_status()
+                    return docSentence, await response.json(content_type=None)
             except Exception as e:
-                logging.debug(f"[{threadId}] Connection builder thread service exception on try {current_try}: {e}")
-                sleep(RELATIONSHIP_EXTRACTION_SERVICE_TIMEOUT)
-                current_try -= 1
+                logging.debug(f"Relationship extraction service exception on try {attempt + 1}: {e}")
+                await asyncio.sleep(min(RELATIONSHIP_EXTRACTION_SERVICE_BACKOFF_MAX, RELATIONSHIP_EXTRACTION_SERVICE_BACKOFF * 2 ** attempt))
+    logging.error(f"Skipping item, could not process sentence: {docSentence.sentence}")
+    return docSentence, None
 
-        if not got_extractions:
-            logging.error(f"[{threadId}] Connection builder thread skipping item, could not process sentence: {docSentence.sentence}")
-            continue
+async def extract_relationships_from_documents(documents:List[Document]) -> None:
+    docSentences = [DocumentSentence(document, sentence) for document in documents for sentence in document.sentences]
 
+    semaphore = asyncio.Semaphore(RELATIONSHIP_EXTRACTION_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=RELATIONSHIP_EXTRACTION_CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [extract_relationships_from_sentence(session, semaphore, d) for d in docSentences]
+        results = await asyncio.gather(*tasks)
+
+    sentences_processed = 0
+    for docSentence, extractions in results:
+        if extractions is None:
+            continue
+        sentences_processed += 1
         for extraction in extractions:
             build_connection_from_extraction(extraction, docSentence.document)
 
-def build_connections_from_documents(documents:List[Document]) -> List[EntityConnection]:
-    if len(connection_list) > 0:
-        logging.info("Skipping build connections, list populated by cache")
-        return
-
-    sentences_count = 0
-    for document in documents:
-        for sentence in document.sentences:
-            sentence_queue.put(DocumentSentence(document, sentence))
-            sentences_count += 1
+    logging.info(f"{sentences_processed} of {len(docSentences)} sentences processed")
 
-    sentences_processed = 0
-    with ThreadPoolExecutor(max_workers=CONNECTION_BUILDER_THREADS) as executor:
-        threadIds = [uuid.uuid4() for _ in range(CONNECTION_BUILDER_THREADS)]
-        futures = executor.map(build_connections_from_document, threadIds)
-        for future in futures:
-            logging.debug(f"Thread result {future}")
-            sentences_processed += int(future[0])
+def build_connections_from_documents(documents:List[Document]) -> None:
+    if len(connection_table) > 0:
+        logging.info("Skipping build connections, table populated by cache")
+        return
 
-    logging.info(f"{sentences_processed} of {sentences_count} sentences processed")
+    asyncio.run(extract_relationships_from_documents(documents))
 
     cache_connections()
 
-def filter_connections_stop_words(connections:List[EntityConnection]):
-    i = 0
-    items_removed = 0
-    current_length = len(connections)
-
-    while i < current_length:
-        connection = connections[i]
-        if connection.from_entity.lower() in nlp.Defaults.stop_words or connection.to_entity.lower() in nlp.Defaults.stop_words:
-            logging.debug(f"removing connection for stop word: {connection}")
-            connections.remove(connection)
-            items_removed += 1
-            current_length -= 1
-        else:
-            i += 1
-
-    logging.info(f"{items_removed} entity connections removed because of stop words")
-
-def filter_connections_dups(connections:List[EntityConnection]):
-    i = 0
-    items_removed = 0
-    no_dup_list = list()
-    current_length = len(connections)
-
-    while i < current_length:
-        connection = connections[i]
-        if connection in no_dup_list:
-            logging.debug(f"removing connection for duplicate: {connection}")
-            connections.remove(connection)
-            items_removed += 1
-            current_length -= 1
+def filter_connections(connections:ConnectionTable):
+    length_before = len(connections)
+    stop_words = ENTITY_STOP_WORDS
+    seen = set()
+    filtered = ConnectionTable()
+    dups_removed = 0
+    stop_words_removed = 0
+
+    for row in connections.rows():
+        from_entity, to_entity = row[0], row[1]
+        if row in seen:
+            logging.debug(f"removing connection for duplicate: {row}")
+            dups_removed += 1
+        elif from_entity.lower() in stop_words or to_entity.lower() in stop_words:
+            logging.debug(f"removing connection for stop word: {row}")
+            stop_words_removed += 1
         else:
-            i += 1
-            no_dup_list.append(connection)
+            seen.add(row)
+            filtered.append(*row)
 
-    logging.info(f"{items_removed} entity connections removed because of duplicates")
-
-def filter_connections(connections:List[EntityConnection]):
-    length_before = len(connections)
+    connections.replace(filtered)
 
-    filter_connections_dups(connections)
+    logging.info(f"{dups_removed} entity connections removed because of duplicates")
 
-    filter_connections_stop_words(connections)
+    logging.info(f"{stop_words_removed} entity connections removed because of stop words")
 
     length_after = len(connections)
 
@@ -313,35 +310,76 @@ def filter_connections(connections:List[EntityConnection]):
 
     cache_filtered_connections()
 
-def build_queries_from_connections(connections:List[EntityConnection], queries:Queue) -> None:
-    for connection in connections:
-        from_entity = connection.from_entity.replace('"', '\\"')
-        to_entity = connection.to_entity.replace('"', '\\"')
-        relationship = connection.relationship.replace('"', '\\"')
+def build_relationship_rows(connections:ConnectionTable) -> List[dict]:
+    rows = list()
+    seen = set()
+    for from_entity, to_entity, relationship, confidence, _ in connections.rows():
+        key = (from_entity, to_entity, relationship, confidence)
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append({
+            "from_entity": from_entity,
+            "to_entity": to_entity,
+            "relationship": relationship,
+            "confidence": confidence,
+        })
+    return rows
+
+def export_bulk_import_files(connections:ConnectionTable):
+    import_dir = os.path.join(DATA_DIRECTORY, IMPORT_DIRECTORY)
+    if not os.path.isdir(import_dir):
+        os.mkdir(import_dir)
+
+    nodes_path = os.path.join(import_dir, IMPORT_NODES_FILE)
+    relationships_path = os.path.join(import_dir, IMPORT_RELATIONSHIPS_FILE)
+
+    names = set(connections.from_entity) | set(connections.to_entity)
+    with open(nodes_path, mode="w", encoding=ENCODING, newline="", buffering=1<<20) as fd:
+        writer = csv.writer(fd)
+        writer.writerow(["name:ID", ":LABEL"])
+        writer.writerows([name, "Entity"] for name in names)
 
-        query = ""
-        query += f'MERGE (f:Entity {{ name: "{from_entity}" }}) '
-        query += f'MERGE (t:Entity {{ name: "{to_entity}" }}) '
-        query += f'MERGE (f)-[:RELATION {{ name: "{relationship}", confidence: {connection.confidence} }}]->(t);'
-        queries.put(query)
-        logging.debug(f"Built query {query}")
+    rows = build_relationship_rows(connections)
+    with open(relationships_path, mode="w", encoding=ENCODING, newline="", buffering=1<<20) as fd:
+        writer = csv.writer(fd)
+        writer.writerow([":START_ID", ":END_ID", "name", "confidence:float", ":TYPE"])
+        writer.writerows([r["from_entity"], r["to_entity"], r["relationship"], r["confidence"], "RELATION"] for r in rows)
+
+    logging.info(f"Exported {len(names)} nodes and {len(rows)} relationships for bulk import")
+
+    return nodes_path, relationships_path
+
+def run_bulk_import(connections:ConnectionTable) -> None:
+    nodes_path, relationships_path = export_bulk_import_files(connections)
+    command = [
+        "neo4j-admin", "database", "import", "full",
+        f"--nodes={nodes_path}",
+        f"--relationships={relationships_path}",
+        NEO4J_DATABASE,
+    ]
+    logging.info(f"Running bulk import: {' '.join(command)}")
+    subprocess.run(command, check=True)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load extracted entity connections into a knowledge graph.")
+    parser.add_argument(
+        "--offline-import",
+        action="store_true",
+        help="write CSV files and bulk load them with neo4j-admin database import instead of Cypher over Bolt (requires the database to be stopped)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
     init_logger()
 
     init_cache()
 
-    init_sentencizer()
-
-    init_sentence_queue()
+    init_connection_table()
 
-    init_connection_list()
-
-    init_query_queue()
-
-    init_relationship_extractor()
-
-    init_loader()
+    if not args.offline_import:
+        init_loader()
 
     data_files = [os.path.join(DATA_DIRECTORY, f) for f in os.listdir(DATA_DIRECTORY) if os.path.isfile(os.path.join(DATA_DIRECTORY, f))]
 
@@ -349,11 +387,12 @@ def main():
 
     build_connections_from_documents(documents)
 
-    filter_connections(connection_list)
-
-    build_queries_from_connections(connection_list, query_queue)
+    filter_connections(connection_table)
 
-    loader.load_queries(query_queue)
+    if args.offline_import:
+        run_bulk_import(connection_table)
+    else:
+        loader.load_connections(connection_table)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file